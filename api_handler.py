@@ -5,19 +5,75 @@ Handles API requests to DummyJSON for product data
 
 import requests
 import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is optional: it parses and serializes several times faster than the
+# stdlib json module, but the handler still works without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Base URL for DummyJSON API
 BASE_URL = "https://dummyjson.com/products"
 
+# On-disk cache for the full product list (revalidated with ETag after TTL)
+PRODUCTS_CACHE_FILE = 'output/.api_cache/products.json'
+PRODUCTS_CACHE_TTL = 3600  # seconds
+
+# Shared session so repeated API calls reuse pooled keep-alive connections
+# instead of paying a new TCP + TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.headers.update({'Connection': 'keep-alive'})
+_SESSION.mount(
+    'https://',
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=50,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429,))
+    )
+)
+
+# Upper bound on product lookups in flight at once across all callers,
+# so bulk lookups stay under the API's rate limit
+MAX_CONCURRENT_REQUESTS = 16
+_REQUEST_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# enrich_sales_data only builds its dense ID-indexed table when the largest
+# product ID is below this multiple of the number of mapped products
+DENSE_LOOKUP_FACTOR = 4
+
 
 # ============================================================================
 # Task 3.1: Fetch Product Details
 # ============================================================================
 
-def fetch_all_products():
+def _print_error(message):
+    """Print an error or warning message to stderr"""
+    print(message, file=sys.stderr)
+
+
+def fetch_all_products(use_cache=True, log=print, error=_print_error):
     """
     Fetches all products from DummyJSON API
     
+    Parameters: use_cache - reuse the on-disk copy in PRODUCTS_CACHE_FILE
+                (served directly within PRODUCTS_CACHE_TTL, revalidated
+                with If-None-Match after that)
+                log - callable receiving each status message (default: print),
+                so callers running the fetch in the background can buffer them
+                error - callable receiving failure and warning messages
+                (default: print to stderr), kept apart from log so they stay
+                visible when progress output is suppressed
+    
     Returns: list of product dictionaries
     
     Expected Output Format:
@@ -40,40 +96,100 @@ def fetch_all_products():
     - Print status message (success/failure)
     """
     
-    print("\n[Fetching Products from API]")
+    log("\n[Fetching Products from API]")
+    
+    # Fetch products with limit=100 to get all products
+    url = f"{BASE_URL}?limit=100"
+    
+    cached = _read_products_cache(url) if use_cache else None
+    if cached and time.time() - cached.get('fetched_at', 0) < PRODUCTS_CACHE_TTL:
+        log(f"✓ Loaded {len(cached['products'])} products from cache")
+        return cached['products']
     
     try:
-        # Fetch products with limit=100 to get all products
-        url = f"{BASE_URL}?limit=100"
-        response = requests.get(url, timeout=10)
+        # Ask the server to skip the body if our cached copy is still current
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        
+        response = _SESSION.get(url, timeout=10, headers=headers)
+        
+        # Cached copy is still valid
+        if response.status_code == 304 and cached:
+            _write_products_cache(url, cached['etag'], cached['products'], error)
+            log(f"✓ Products unchanged, using {len(cached['products'])} cached products")
+            return cached['products']
         
         # Check if request was successful
         if response.status_code == 200:
-            data = response.json()
+            data = _loads_json(response.content)
             products = data.get('products', [])
-            print(f"✓ Successfully fetched {len(products)} products from API")
+            log(f"✓ Successfully fetched {len(products)} products from API")
+            if use_cache:
+                _write_products_cache(url, response.headers.get('ETag'), products, error)
             return products
         else:
-            print(f"✗ API request failed with status code: {response.status_code}")
+            error(f"✗ API request failed with status code: {response.status_code}")
             return []
     
     except requests.exceptions.ConnectionError:
-        print("✗ Connection error: Unable to connect to API")
+        error("✗ Connection error: Unable to connect to API")
         return []
     
     except requests.exceptions.Timeout:
-        print("✗ Timeout error: API request took too long")
+        error("✗ Timeout error: API request took too long")
         return []
     
     except requests.exceptions.RequestException as e:
-        print(f"✗ API request error: {e}")
+        error(f"✗ API request error: {e}")
         return []
     
     except Exception as e:
-        print(f"✗ Unexpected error: {e}")
+        error(f"✗ Unexpected error: {e}")
         return []
 
 
+def _read_products_cache(url):
+    """
+    Load the cached product list for url
+    Returns the cache entry dict, or None if missing, unreadable, malformed
+    or for another URL
+    """
+    try:
+        with open(PRODUCTS_CACHE_FILE, 'rb') as f:
+            entry = _loads_json(f.read())
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(entry, dict) or entry.get('url') != url:
+        return None
+    
+    # A file that parses but holds bad values is treated like a missing one
+    products = entry.get('products')
+    fetched_at = entry.get('fetched_at')
+    if not isinstance(products, list) or not all(isinstance(p, dict) for p in products):
+        return None
+    if isinstance(fetched_at, bool) or not isinstance(fetched_at, (int, float)):
+        return None
+    if not math.isfinite(fetched_at):
+        return None
+    return entry
+
+
+def _write_products_cache(url, etag, products, error=_print_error):
+    """
+    Store the product list with its ETag and fetch time
+    Failures are reported through error but never stop the pipeline
+    """
+    entry = {'url': url, 'etag': etag, 'fetched_at': time.time(), 'products': products}
+    try:
+        os.makedirs(os.path.dirname(PRODUCTS_CACHE_FILE), exist_ok=True)
+        with open(PRODUCTS_CACHE_FILE, 'wb') as f:
+            f.write(_dumps_json(entry))
+    except OSError as e:
+        error(f"⚠ Could not write products cache: {e}")
+
+
 def create_product_mapping(api_products):
     """
     Creates a mapping of product IDs to product info
@@ -90,20 +206,16 @@ def create_product_mapping(api_products):
     }
     """
     
-    product_mapping = {}
-    
-    for product in api_products:
-        product_id = product.get('id')
-        
-        if product_id is not None:
-            product_mapping[product_id] = {
-                'title': product.get('title', 'Unknown'),
-                'category': product.get('category', 'Unknown'),
-                'brand': product.get('brand', 'Unknown'),
-                'rating': product.get('rating', 0.0)
-            }
-    
-    return product_mapping
+    return {
+        product['id']: {
+            'title': product.get('title', 'Unknown'),
+            'category': product.get('category', 'Unknown'),
+            'brand': product.get('brand', 'Unknown'),
+            'rating': product.get('rating', 0.0)
+        }
+        for product in api_products
+        if product.get('id') is not None
+    }
 
 
 def get_product_by_id(product_id):
@@ -121,19 +233,55 @@ def get_product_by_id(product_id):
     
     try:
         url = f"{BASE_URL}/{product_id}"
-        response = requests.get(url, timeout=10)
+        with _REQUEST_SLOTS:
+            response = _SESSION.get(url, timeout=10)
         
         if response.status_code == 200:
-            return response.json()
+            return _loads_json(response.content)
         else:
-            print(f"✗ Product ID {product_id} not found")
+            print(f"✗ Product ID {product_id} not found", file=sys.stderr)
             return None
     
     except Exception as e:
-        print(f"✗ Error fetching product {product_id}: {e}")
+        print(f"✗ Error fetching product {product_id}: {e}", file=sys.stderr)
         return None
 
 
+def get_products_by_ids(product_ids, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Fetches several products by ID concurrently from DummyJSON API
+
+    Parameters:
+    - product_ids: iterable of product IDs (int)
+    - max_workers: number of worker threads (requests in flight are
+      additionally capped at MAX_CONCURRENT_REQUESTS across all callers)
+
+    Returns: dictionary mapping product ID to product dictionary
+             (IDs that could not be fetched are left out)
+
+    Example:
+    products = get_products_by_ids([1, 2, 3])
+    # Returns: {1: {'id': 1, 'title': 'iPhone 9', ...}, 2: {...}, 3: {...}}
+    """
+
+    # Drop duplicates while keeping the caller's order
+    unique_ids = list(dict.fromkeys(product_ids))
+
+    if not unique_ids:
+        return {}
+
+    # Requests are network-bound, so threads overlap the waiting time
+    workers = min(max_workers, len(unique_ids))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(get_product_by_id, unique_ids)
+
+        return {
+            product_id: product
+            for product_id, product in zip(unique_ids, results)
+            if product is not None
+        }
+
+
 def search_products(query):
     """
     Search products by query string
@@ -149,19 +297,19 @@ def search_products(query):
     
     try:
         url = f"{BASE_URL}/search?q={query}"
-        response = requests.get(url, timeout=10)
+        response = _SESSION.get(url, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
+            data = _loads_json(response.content)
             products = data.get('products', [])
             print(f"✓ Found {len(products)} products matching '{query}'")
             return products
         else:
-            print(f"✗ Search failed for query: {query}")
+            print(f"✗ Search failed for query: {query}", file=sys.stderr)
             return []
     
     except Exception as e:
-        print(f"✗ Error searching products: {e}")
+        print(f"✗ Error searching products: {e}", file=sys.stderr)
         return []
 
 
@@ -175,11 +323,29 @@ def save_products_to_file(products, filename='output/api_products.json'):
     """
     
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(products, f, indent=2, ensure_ascii=False)
+        with open(filename, 'wb') as f:
+            f.write(_dumps_json(products))
         print(f"✓ Products saved to {filename}")
     except Exception as e:
-        print(f"✗ Error saving products to file: {e}")
+        print(f"✗ Error saving products to file: {e}", file=sys.stderr)
+
+
+def _loads_json(raw):
+    """
+    Decode a JSON response body (bytes), using orjson when available
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps_json(data):
+    """
+    Serialize data to indented UTF-8 JSON bytes, using orjson when available
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
 
 
 def print_product_summary(products):
@@ -197,29 +363,25 @@ def print_product_summary(products):
     print("PRODUCT SUMMARY")
     print("="*60)
     
-    # Count by category
-    categories = {}
-    brands = {}
+    # Count by category and brand
+    categories = Counter()
+    brands = Counter()
     
     for product in products:
-        category = product.get('category', 'Unknown')
-        brand = product.get('brand', 'Unknown')
-        
-        categories[category] = categories.get(category, 0) + 1
-        brands[brand] = brands.get(brand, 0) + 1
+        get = product.get
+        categories[get('category', 'Unknown')] += 1
+        brands[get('brand', 'Unknown')] += 1
     
     print(f"\nTotal Products: {len(products)}")
     print(f"Categories: {len(categories)}")
     print(f"Brands: {len(brands)}")
     
     print("\nTop 5 Categories:")
-    sorted_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:5]
-    for category, count in sorted_categories:
+    for category, count in categories.most_common(5):
         print(f"  {category}: {count} products")
     
     print("\nTop 5 Brands:")
-    sorted_brands = sorted(brands.items(), key=lambda x: x[1], reverse=True)[:5]
-    for brand, count in sorted_brands:
+    for brand, count in brands.most_common(5):
         print(f"  {brand}: {count} products")
     
     print("="*60)
@@ -229,13 +391,23 @@ def print_product_summary(products):
 # Task 3.2: Enrich Sales Data
 # ============================================================================
 
-def enrich_sales_data(transactions, product_mapping):
+# API fields for transactions without a matching product (copied, never mutated)
+_NO_API_MATCH = {
+    'API_Category': None,
+    'API_Brand': None,
+    'API_Rating': None,
+    'API_Match': False
+}
+
+def enrich_sales_data(transactions, product_mapping, in_place=False):
     """
     Enriches transaction data with API product information
     
     Parameters:
     - transactions: list of transaction dictionaries
     - product_mapping: dictionary from create_product_mapping()
+    - in_place: add the API fields to the given dictionaries instead of
+      building copies (use when the caller owns the transactions)
     
     Returns: list of enriched transaction dictionaries
     
@@ -269,47 +441,51 @@ def enrich_sales_data(transactions, product_mapping):
     match_count = 0
     no_match_count = 0
     
+    # DummyJSON IDs are small sequential integers, so index a dense list
+    # instead of hashing into product_mapping for every transaction; sparse
+    # or huge IDs would make that list enormous, so fall back to dict lookups
+    max_id = max((pid for pid in product_mapping if isinstance(pid, int)), default=-1)
+    lookup_table = None
+    if max_id < DENSE_LOOKUP_FACTOR * len(product_mapping):
+        lookup_table = [None] * (max_id + 1)
+        for pid, info in product_mapping.items():
+            if isinstance(pid, int) and pid >= 0:
+                lookup_table[pid] = info
+    
     for transaction in transactions:
-        # Create a copy of the transaction
-        enriched = transaction.copy()
-        
+        # Extract numeric ID from ProductID (e.g., 'P101' -> 101, 'P5' -> 5)
+        product_id_str = transaction.get('ProductID', '')
         try:
-            # Extract numeric ID from ProductID (e.g., 'P101' -> 101, 'P5' -> 5)
-            product_id_str = transaction.get('ProductID', '')
-            
-            # Remove 'P' prefix and convert to integer
-            if product_id_str.startswith('P'):
-                numeric_id = int(product_id_str[1:])
-            else:
-                numeric_id = int(product_id_str)
-            
-            # Check if product exists in mapping
-            if numeric_id in product_mapping:
-                product_info = product_mapping[numeric_id]
-                
-                # Add API fields
-                enriched['API_Category'] = product_info.get('category', None)
-                enriched['API_Brand'] = product_info.get('brand', None)
-                enriched['API_Rating'] = product_info.get('rating', None)
-                enriched['API_Match'] = True
-                match_count += 1
-            else:
-                # Product not found in API
-                enriched['API_Category'] = None
-                enriched['API_Brand'] = None
-                enriched['API_Rating'] = None
-                enriched['API_Match'] = False
-                no_match_count += 1
+            numeric_id = int(product_id_str[1:] if product_id_str[:1] == 'P' else product_id_str)
+        except (ValueError, TypeError):
+            numeric_id = -1
         
-        except (ValueError, TypeError, AttributeError) as e:
-            # Handle errors gracefully
-            enriched['API_Category'] = None
-            enriched['API_Brand'] = None
-            enriched['API_Rating'] = None
-            enriched['API_Match'] = False
+        if lookup_table is not None:
+            product_info = lookup_table[numeric_id] if 0 <= numeric_id <= max_id else None
+        else:
+            product_info = product_mapping.get(numeric_id)
+        
+        if product_info is not None:
+            # Add API fields
+            info_get = product_info.get
+            api_fields = {
+                'API_Category': info_get('category', None),
+                'API_Brand': info_get('brand', None),
+                'API_Rating': info_get('rating', None),
+                'API_Match': True
+            }
+            match_count += 1
+        else:
+            # Product not found in API (or ProductID not numeric)
+            api_fields = _NO_API_MATCH
             no_match_count += 1
         
-        enriched_transactions.append(enriched)
+        if in_place:
+            transaction.update(api_fields)
+            enriched_transactions.append(transaction)
+        else:
+            # Build the copy and the new fields in one dict construction
+            enriched_transactions.append({**transaction, **api_fields})
     
     print(f"✓ Enriched {len(enriched_transactions)} transactions")
     print(f"  - Matched with API: {match_count}")
@@ -336,40 +512,44 @@ def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data
     print(f"\n[Saving Enriched Data to {filename}]")
     
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            # Write header
-            header = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-            f.write(header)
+        # Header
+        lines = ["TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"]
+        add_line = lines.append
+        
+        # Format all rows first, then write the file in a single call
+        for transaction in enriched_transactions:
+            get = transaction.get
+            
+            # Handle None values
+            api_category = get('API_Category') or ''
+            api_brand = get('API_Brand') or ''
+            api_rating = get('API_Rating') or ''
+            api_match = get('API_Match', False)
             
-            # Write data
-            for transaction in enriched_transactions:
-                # Handle None values
-                api_category = transaction.get('API_Category') or ''
-                api_brand = transaction.get('API_Brand') or ''
-                api_rating = transaction.get('API_Rating') or ''
-                api_match = transaction.get('API_Match', False)
-                
-                line = (
-                    f"{transaction.get('TransactionID', '')}|"
-                    f"{transaction.get('Date', '')}|"
-                    f"{transaction.get('ProductID', '')}|"
-                    f"{transaction.get('ProductName', '')}|"
-                    f"{transaction.get('Quantity', '')}|"
-                    f"{transaction.get('UnitPrice', '')}|"
-                    f"{transaction.get('CustomerID', '')}|"
-                    f"{transaction.get('Region', '')}|"
-                    f"{api_category}|"
-                    f"{api_brand}|"
-                    f"{api_rating}|"
-                    f"{api_match}\n"
-                )
-                f.write(line)
+            line = (
+                f"{get('TransactionID', '')}|"
+                f"{get('Date', '')}|"
+                f"{get('ProductID', '')}|"
+                f"{get('ProductName', '')}|"
+                f"{get('Quantity', '')}|"
+                f"{get('UnitPrice', '')}|"
+                f"{get('CustomerID', '')}|"
+                f"{get('Region', '')}|"
+                f"{api_category}|"
+                f"{api_brand}|"
+                f"{api_rating}|"
+                f"{api_match}\n"
+            )
+            add_line(line)
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
         
         print(f"✓ Enriched data saved to {filename}")
         return True
     
     except Exception as e:
-        print(f"✗ Error saving enriched data: {e}")
+        print(f"✗ Error saving enriched data: {e}", file=sys.stderr)
         return False
 
 
@@ -382,8 +562,20 @@ def print_enrichment_summary(enriched_transactions):
     print("ENRICHMENT SUMMARY")
     print("="*60)
     
+    # Single pass over the transactions for the match count and both
+    # distributions
     total = len(enriched_transactions)
-    matched = sum(1 for t in enriched_transactions if t.get('API_Match') == True)
+    matched = 0
+    categories = Counter()
+    brands = Counter()
+    
+    for transaction in enriched_transactions:
+        get = transaction.get
+        if get('API_Match'):
+            matched += 1
+            categories[get('API_Category', 'Unknown')] += 1
+            brands[get('API_Brand', 'Unknown')] += 1
+    
     not_matched = total - matched
     
     print(f"\nTotal Transactions: {total}")
@@ -394,27 +586,15 @@ def print_enrichment_summary(enriched_transactions):
         print(f"Success Rate: {(matched/total*100):.2f}%")
     
     # Show API categories distribution
-    categories = {}
-    for transaction in enriched_transactions:
-        if transaction.get('API_Match'):
-            category = transaction.get('API_Category', 'Unknown')
-            categories[category] = categories.get(category, 0) + 1
-    
     if categories:
         print("\nAPI Categories Found:")
-        for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+        for category, count in categories.most_common():
             print(f"  {category}: {count} transactions")
     
     # Show API brands distribution
-    brands = {}
-    for transaction in enriched_transactions:
-        if transaction.get('API_Match'):
-            brand = transaction.get('API_Brand', 'Unknown')
-            brands[brand] = brands.get(brand, 0) + 1
-    
     if brands:
         print("\nAPI Brands Found:")
-        for brand, count in sorted(brands.items(), key=lambda x: x[1], reverse=True)[:10]:
+        for brand, count in brands.most_common(10):
             print(f"  {brand}: {count} transactions")
     
     print("="*60)
\ No newline at end of file
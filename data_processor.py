@@ -1,4 +1,14 @@
+import heapq
 import re
+import sys
+from collections import defaultdict
+from itertools import islice
+from operator import itemgetter
+
+from utils.file_handler import parse_line, create_line, parse_number
+
+# A numeric-looking field (only digits, separators and sign)
+_NUMERIC_RE = re.compile(r'^[\d,.\-]+$')
 
 class DataCleaner:
     def __init__(self):
@@ -18,16 +28,17 @@ class DataCleaner:
         
         # Extract fields based on YOUR column structure
         # TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region
-        transaction_id = fields[0].strip() if len(fields) > 0 else ""
-        customer_id = fields[6].strip() if len(fields) > 6 else ""
-        region = fields[7].strip() if len(fields) > 7 else ""
-        quantity = fields[4].strip() if len(fields) > 4 else ""
-        unit_price = fields[5].strip() if len(fields) > 5 else ""
+        customer_id = fields[6].strip()
+        region = fields[7].strip()
         
         # Rule 1: Missing CustomerID or Region → Remove
         if not customer_id or not region:
             return False, "Missing CustomerID or Region"
         
+        transaction_id = fields[0].strip()
+        quantity = fields[4].strip()
+        unit_price = fields[5].strip()
+        
         # Rule 2: Quantity <= 0 → Remove
         try:
             qty = self.clean_numeric(quantity)
@@ -66,7 +77,7 @@ class DataCleaner:
         Clean individual field - remove commas from numeric-looking fields
         """
         # If field looks like a number (contains only digits, dots, commas, minus)
-        if re.match(r'^[\d,.\-]+$', field):
+        if _NUMERIC_RE.match(field):
             return field.replace(',', '')
         return field
     
@@ -90,55 +101,64 @@ class DataCleaner:
             # Index 3: ProductName - remove commas
             if i == 3:
                 cleaned_fields.append(self.clean_product_name(field))
-            # Index 4: Quantity - remove commas from numbers
-            elif i == 4:
-                cleaned_fields.append(self.clean_field(field))
-            # Index 5: UnitPrice - remove commas from numbers
-            elif i == 5:
-                cleaned_fields.append(self.clean_field(field))
+            # Index 4/5: Quantity/UnitPrice - already validated as numeric,
+            # so the commas can be stripped without re-checking the format
+            elif i == 4 or i == 5:
+                cleaned_fields.append(field.replace(',', ''))
             else:
                 cleaned_fields.append(field)
         
         return cleaned_fields
     
-    def process_records(self, lines):
+    def process_records(self, lines, has_header=True):
         """
         Main processing function
+        lines can be a whole file or one batch of it; pass has_header=False
+        for every batch after the first (counters accumulate across calls)
         Returns (valid_lines, invalid_lines)
         """
         valid_lines = []
         invalid_lines = []
+        header_count = 0
         
         # Keep header
-        if lines:
+        if has_header and lines:
             header = lines[0]
             valid_lines.append(header)
             lines = lines[1:]
+            header_count = 1
         
-        self.total_records = len(lines)
+        self.total_records += len(lines)
+        
+        # Bind hot-loop callables once instead of looking them up per line
+        is_valid_record = self.is_valid_record
+        clean_record = self.clean_record
+        add_valid = valid_lines.append
+        add_invalid = invalid_lines.append
+        add_reason = self.invalid_reasons.append
         
         for line in lines:
             # Skip empty lines
             if not line.strip():
                 continue
             
-            from utils.file_handler import parse_line
             fields = parse_line(line)
             
             # Check validity
-            is_valid, reason = self.is_valid_record(fields)
+            is_valid, reason = is_valid_record(fields)
             
             if is_valid:
                 # Clean and keep the record
-                cleaned_fields = self.clean_record(fields)
-                from utils.file_handler import create_line
-                valid_lines.append(create_line(cleaned_fields))
-                self.valid_records += 1
+                cleaned_fields = clean_record(fields)
+                add_valid(create_line(cleaned_fields))
             else:
                 # Remove invalid record
-                self.invalid_records += 1
-                self.invalid_reasons.append(f"{reason}: {line.strip()}")
-                invalid_lines.append(line)
+                add_reason(f"{reason}: {line.strip()}")
+                add_invalid(line)
+        
+        # Derive counters from the output sizes rather than per-record updates
+        self.valid_records += len(valid_lines) - header_count
+        self.invalid_records += len(invalid_lines)
         
         return valid_lines, invalid_lines
     
@@ -159,6 +179,47 @@ class DataCleaner:
 # Task 2.1: Sales Summary Calculator
 # ============================================================================
 
+# Accumulator entries shared by the individual analytics and
+# compute_all_analytics(), one per region / product / customer
+def _new_region_entry():
+    return {'total_sales': 0.0, 'transaction_count': 0, 'percentage': 0.0}
+
+
+def _new_product_entry():
+    return {'total_quantity': 0, 'total_revenue': 0.0}
+
+
+def _new_customer_entry():
+    return {
+        'total_spent': 0.0,
+        'purchase_count': 0,
+        'avg_order_value': 0.0,
+        'products_bought': {}
+    }
+
+
+def _transaction_amounts(transaction):
+    """
+    (quantity, revenue) of a single transaction, parsed from the raw
+    Quantity/UnitPrice strings
+    Raises ValueError if Quantity or UnitPrice is not numeric
+    """
+    quantity = parse_number(transaction.get('Quantity', 0))
+    unit_price = parse_number(transaction.get('UnitPrice', 0))
+    return quantity, quantity * unit_price
+
+
+def _transaction_revenue(transaction):
+    """
+    Revenue (Quantity * UnitPrice) of a single transaction
+    Returns None if either value is missing or not numeric
+    """
+    try:
+        return _transaction_amounts(transaction)[1]
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
 def calculate_total_revenue(transactions):
     """
     Calculates total revenue from all transactions
@@ -168,24 +229,10 @@ def calculate_total_revenue(transactions):
     Expected Output: Single number representing sum of (Quantity * UnitPrice)
     Example: 1545000.50
     """
-    total_revenue = 0.0
-    
-    for transaction in transactions:
-        try:
-            # Extract and clean quantity
-            quantity = float(str(transaction.get('Quantity', 0)).replace(',', ''))
-            # Extract and clean unit price
-            unit_price = float(str(transaction.get('UnitPrice', 0)).replace(',', ''))
-            
-            # Calculate revenue for this transaction
-            revenue = quantity * unit_price
-            total_revenue += revenue
-            
-        except (ValueError, TypeError, AttributeError):
-            # Skip transactions with invalid data
-            continue
-    
-    return total_revenue
+    # One pass with no intermediate list: map() applies the revenue helper
+    # lazily and the generator drops invalid rows (None) before sum()
+    revenues = map(_transaction_revenue, transactions)
+    return sum((revenue for revenue in revenues if revenue is not None), 0.0)
 
 
 def region_wise_sales(transactions):
@@ -213,32 +260,27 @@ def region_wise_sales(transactions):
     """
     
     # Step 1: Aggregate data by region
-    region_data = {}
+    region_data = defaultdict(_new_region_entry)
     total_revenue = 0.0
     
     for transaction in transactions:
-        try:
-            region = transaction.get('Region', 'Unknown')
-            quantity = float(str(transaction.get('Quantity', 0)).replace(',', ''))
-            unit_price = float(str(transaction.get('UnitPrice', 0)).replace(',', ''))
-            revenue = quantity * unit_price
-            
-            # Initialize region if not exists
-            if region not in region_data:
-                region_data[region] = {
-                    'total_sales': 0.0,
-                    'transaction_count': 0,
-                    'percentage': 0.0
-                }
-            
-            # Update region data
-            region_data[region]['total_sales'] += revenue
-            region_data[region]['transaction_count'] += 1
-            total_revenue += revenue
-            
-        except (ValueError, TypeError, AttributeError):
+        revenue = _transaction_revenue(transaction)
+        if revenue is None:
             continue
+        
+        # Update region data (entry is created on first access)
+        entry = region_data[transaction.get('Region', 'Unknown')]
+        entry['total_sales'] += revenue
+        entry['transaction_count'] += 1
+        total_revenue += revenue
     
+    return _rank_regions(region_data, total_revenue)
+
+
+def _rank_regions(region_data, total_revenue):
+    """
+    Fill in region percentages and sort regions by total_sales descending
+    """
     # Step 2: Calculate percentages
     for region in region_data:
         if total_revenue > 0:
@@ -281,40 +323,37 @@ def top_selling_products(transactions, n=5):
     """
     
     # Step 1: Aggregate by ProductName
-    product_data = {}
+    product_data = defaultdict(_new_product_entry)
     
     for transaction in transactions:
         try:
             product_name = transaction.get('ProductName', 'Unknown')
-            quantity = float(str(transaction.get('Quantity', 0)).replace(',', ''))
-            unit_price = float(str(transaction.get('UnitPrice', 0)).replace(',', ''))
-            revenue = quantity * unit_price
+            quantity, revenue = _transaction_amounts(transaction)
             
-            # Initialize product if not exists
-            if product_name not in product_data:
-                product_data[product_name] = {
-                    'total_quantity': 0,
-                    'total_revenue': 0.0
-                }
-            
-            # Update product data
-            product_data[product_name]['total_quantity'] += quantity
-            product_data[product_name]['total_revenue'] += revenue
+            # Update product data (entry is created on first access)
+            entry = product_data[product_name]
+            entry['total_quantity'] += quantity
+            entry['total_revenue'] += revenue
             
         except (ValueError, TypeError, AttributeError):
             continue
     
+    return _top_products(product_data, n)
+
+
+def _top_products(product_data, n):
+    """
+    Top n (ProductName, TotalQuantity, TotalRevenue) tuples by quantity
+    """
     # Step 2: Convert to list of tuples
     product_list = [
         (name, data['total_quantity'], data['total_revenue'])
         for name, data in product_data.items()
     ]
     
-    # Step 3: Sort by total_quantity descending
-    product_list.sort(key=lambda x: x[1], reverse=True)
-    
-    # Step 4: Return top n products
-    return product_list[:n]
+    # Step 3: Pick the top n by total_quantity descending
+    # (heap selection is O(M log n) instead of sorting all M products)
+    return heapq.nlargest(n, product_list, key=itemgetter(1))
 
 
 def customer_analysis(transactions):
@@ -344,41 +383,38 @@ def customer_analysis(transactions):
     """
     
     # Step 1: Aggregate data by CustomerID
-    customer_data = {}
+    customer_data = defaultdict(_new_customer_entry)
     
     for transaction in transactions:
         try:
             customer_id = transaction.get('CustomerID', 'Unknown')
             product_name = transaction.get('ProductName', 'Unknown')
-            quantity = float(str(transaction.get('Quantity', 0)).replace(',', ''))
-            unit_price = float(str(transaction.get('UnitPrice', 0)).replace(',', ''))
-            amount = quantity * unit_price
-            
-            # Initialize customer if not exists
-            if customer_id not in customer_data:
-                customer_data[customer_id] = {
-                    'total_spent': 0.0,
-                    'purchase_count': 0,
-                    'avg_order_value': 0.0,
-                    'products_bought': []
-                }
+            quantity, amount = _transaction_amounts(transaction)
             
-            # Update customer data
-            customer_data[customer_id]['total_spent'] += amount
-            customer_data[customer_id]['purchase_count'] += 1
+            # Update customer data (entry is created on first access)
+            entry = customer_data[customer_id]
+            entry['total_spent'] += amount
+            entry['purchase_count'] += 1
             
-            # Add product to list if not already there
-            if product_name not in customer_data[customer_id]['products_bought']:
-                customer_data[customer_id]['products_bought'].append(product_name)
+            # Track unique products in a dict (O(1) membership, keeps purchase order)
+            entry['products_bought'][product_name] = None
             
         except (ValueError, TypeError, AttributeError):
             continue
     
-    # Step 2: Calculate average order value
-    for customer_id in customer_data:
-        if customer_data[customer_id]['purchase_count'] > 0:
-            customer_data[customer_id]['avg_order_value'] = round(
-                customer_data[customer_id]['total_spent'] / customer_data[customer_id]['purchase_count'],
+    return _rank_customers(customer_data)
+
+
+def _rank_customers(customer_data):
+    """
+    Fill in average order values and sort customers by total_spent descending
+    """
+    # Step 2: Calculate average order value and materialize product lists
+    for entry in customer_data.values():
+        entry['products_bought'] = list(entry['products_bought'])
+        if entry['purchase_count'] > 0:
+            entry['avg_order_value'] = round(
+                entry['total_spent'] / entry['purchase_count'],
                 2
             )
     
@@ -401,6 +437,64 @@ from datetime import datetime
 # Task 2.2: Date-based Analysis
 # ============================================================================
 
+# Per-date accumulator entries, with and without the set of customers
+def _new_daily_entry():
+    return {'revenue': 0.0, 'transaction_count': 0, 'unique_customers': set()}
+
+
+def _new_daily_totals():
+    return {'revenue': 0.0, 'transaction_count': 0}
+
+
+def _aggregate_by_date(transactions, track_customers=True):
+    """
+    Single pass grouping of revenue and transaction count by date
+    Also collects the set of customers per date when track_customers is True;
+    otherwise entries have no 'unique_customers' key and no set is created
+    Returns: unsorted dictionary keyed by date
+    """
+    daily_data = defaultdict(_new_daily_entry if track_customers else _new_daily_totals)
+    return _update_daily(daily_data, _dated_revenues(transactions), track_customers)
+
+
+def _dated_revenues(transactions):
+    """
+    (date, customer_id, revenue) of each transaction, with Date and
+    CustomerID stripped; rows whose amounts are not numeric or whose
+    Date/CustomerID is not text are skipped
+    """
+    for transaction in transactions:
+        try:
+            date = transaction.get('Date', '').strip()
+            customer_id = transaction.get('CustomerID', '').strip()
+            quantity, revenue = _transaction_amounts(transaction)
+        except (ValueError, TypeError, AttributeError):
+            continue
+        yield date, customer_id, revenue
+
+
+def _update_daily(daily_data, rows, track_customers=True):
+    """
+    Add (date, customer_id, revenue) rows to the daily_data defaultdict
+    Returns: daily_data
+    """
+    # Sales files are usually ordered by date, so consecutive rows share an
+    # entry; only look the date up again when the run of equal dates ends
+    last_date = None
+    entry = None
+    
+    for date, customer_id, revenue in rows:
+        if date != last_date:
+            entry = daily_data[date]
+            last_date = date
+        entry['revenue'] += revenue
+        entry['transaction_count'] += 1
+        if track_customers:
+            entry['unique_customers'].add(customer_id)
+    
+    return daily_data
+
+
 def daily_sales_trend(transactions):
     """
     Analyzes sales trends by date
@@ -427,32 +521,15 @@ def daily_sales_trend(transactions):
     """
     
     # Step 1: Aggregate data by date
-    daily_data = {}
-    
-    for transaction in transactions:
-        try:
-            date = transaction.get('Date', '').strip()
-            customer_id = transaction.get('CustomerID', '').strip()
-            quantity = float(str(transaction.get('Quantity', 0)).replace(',', ''))
-            unit_price = float(str(transaction.get('UnitPrice', 0)).replace(',', ''))
-            revenue = quantity * unit_price
-            
-            # Initialize date if not exists
-            if date not in daily_data:
-                daily_data[date] = {
-                    'revenue': 0.0,
-                    'transaction_count': 0,
-                    'unique_customers': set()
-                }
-            
-            # Update daily data
-            daily_data[date]['revenue'] += revenue
-            daily_data[date]['transaction_count'] += 1
-            daily_data[date]['unique_customers'].add(customer_id)
-            
-        except (ValueError, TypeError, AttributeError):
-            continue
+    daily_data = _aggregate_by_date(transactions)
     
+    return _daily_trend(daily_data)
+
+
+def _daily_trend(daily_data):
+    """
+    Turn per-date aggregates into the date-sorted daily trend dict
+    """
     # Step 2: Convert sets to counts
     result = {}
     for date, data in daily_data.items():
@@ -468,10 +545,13 @@ def daily_sales_trend(transactions):
     return sorted_result
 
 
-def find_peak_sales_day(transactions):
+def find_peak_sales_day(transactions, daily_trend=None):
     """
     Identifies the date with highest revenue
     
+    Pass daily_trend (the result of daily_sales_trend) to reuse an
+    existing aggregation instead of re-scanning transactions
+    
     Returns: tuple (date, revenue, transaction_count)
     
     Expected Output Format:
@@ -482,18 +562,26 @@ def find_peak_sales_day(transactions):
     - Return date, revenue, and transaction count
     """
     
-    # Step 1: Get daily sales data
-    daily_sales = daily_sales_trend(transactions)
+    if daily_trend is not None:
+        if not daily_trend:
+            return (None, 0.0, 0)
+        
+        # The trend is date-sorted with rounded revenue, so max() keeps the
+        # earliest date on ties, matching the aggregation path below
+        date, stats = max(daily_trend.items(), key=lambda item: item[1]['revenue'])
+        return (date, stats['revenue'], stats['transaction_count'])
     
-    if not daily_sales:
-        return (None, 0.0, 0)
+    # Step 1: Aggregate revenue by date in one pass (no customer sets,
+    # no intermediate sorted trend dict)
+    daily_data = _aggregate_by_date(transactions, track_customers=False)
     
-    # Step 2: Find peak day
-    peak_day = max(daily_sales.items(), key=lambda x: x[1]['revenue'])
+    if not daily_data:
+        return (None, 0.0, 0)
     
-    date = peak_day[0]
-    revenue = peak_day[1]['revenue']
-    transaction_count = peak_day[1]['transaction_count']
+    # Step 2: Find peak day (earliest date wins ties, as in the daily trend)
+    date = max(sorted(daily_data), key=lambda d: round(daily_data[d]['revenue'], 2))
+    revenue = round(daily_data[date]['revenue'], 2)
+    transaction_count = daily_data[date]['transaction_count']
     
     return (date, revenue, transaction_count)
 
@@ -522,29 +610,28 @@ def low_performing_products(transactions, threshold=10):
     """
     
     # Step 1: Aggregate by ProductName
-    product_data = {}
+    product_data = defaultdict(_new_product_entry)
     
     for transaction in transactions:
         try:
             product_name = transaction.get('ProductName', 'Unknown')
-            quantity = float(str(transaction.get('Quantity', 0)).replace(',', ''))
-            unit_price = float(str(transaction.get('UnitPrice', 0)).replace(',', ''))
-            revenue = quantity * unit_price
-            
-            # Initialize product if not exists
-            if product_name not in product_data:
-                product_data[product_name] = {
-                    'total_quantity': 0,
-                    'total_revenue': 0.0
-                }
+            quantity, revenue = _transaction_amounts(transaction)
             
-            # Update product data
-            product_data[product_name]['total_quantity'] += quantity
-            product_data[product_name]['total_revenue'] += revenue
+            # Update product data (entry is created on first access)
+            entry = product_data[product_name]
+            entry['total_quantity'] += quantity
+            entry['total_revenue'] += revenue
             
         except (ValueError, TypeError, AttributeError):
             continue
     
+    return _low_products(product_data, threshold)
+
+
+def _low_products(product_data, threshold):
+    """
+    Products with total quantity below threshold, by quantity ascending
+    """
     # Step 2: Filter products with quantity < threshold
     low_performing = []
     
@@ -557,20 +644,120 @@ def low_performing_products(transactions, threshold=10):
             ))
     
     # Step 3: Sort by TotalQuantity ascending
-    low_performing.sort(key=lambda x: x[1])
+    low_performing.sort(key=itemgetter(1))
     
     return low_performing
 
+
+def compute_all_analytics(transactions, top_n=5, low_threshold=10):
+    """
+    Runs every Part 2 analytic in a single pass over transactions
+    
+    Returns: dictionary with the same results as the individual functions
+    {
+        'total_revenue': calculate_total_revenue(...),
+        'region_sales': region_wise_sales(...),
+        'top_products': top_selling_products(..., n=top_n),
+        'customer_stats': customer_analysis(...),
+        'daily_trend': daily_sales_trend(...),
+        'peak_day': find_peak_sales_day(...),
+        'low_products': low_performing_products(..., threshold=low_threshold),
+        'date_range': (first Date, last Date) over every row with a Date,
+                      including rows the other analytics skip, or None
+    }
+    """
+    
+    # Step 1: Update every accumulator from each row in one pass; the rows
+    # yielded for the daily trend feed the same loop as _aggregate_by_date()
+    total_revenue = 0.0
+    first_date = last_date = None
+    region_data = defaultdict(_new_region_entry)
+    product_data = defaultdict(_new_product_entry)
+    customer_data = defaultdict(_new_customer_entry)
+    
+    def dated_revenues():
+        nonlocal total_revenue, first_date, last_date
+        for transaction in transactions:
+            get = transaction.get
+            
+            # The date range also counts rows without numeric amounts
+            raw_date = get('Date')
+            if raw_date:
+                if first_date is None or raw_date < first_date:
+                    first_date = raw_date
+                if last_date is None or raw_date > last_date:
+                    last_date = raw_date
+            
+            try:
+                quantity, revenue = _transaction_amounts(transaction)
+            except (ValueError, TypeError, AttributeError):
+                # Every analytic skips rows without numeric amounts
+                continue
+            
+            product_name = get('ProductName', 'Unknown')
+            customer_id = get('CustomerID', 'Unknown')
+            total_revenue += revenue
+            
+            entry = region_data[get('Region', 'Unknown')]
+            entry['total_sales'] += revenue
+            entry['transaction_count'] += 1
+            
+            entry = product_data[product_name]
+            entry['total_quantity'] += quantity
+            entry['total_revenue'] += revenue
+            
+            entry = customer_data[customer_id]
+            entry['total_spent'] += revenue
+            entry['purchase_count'] += 1
+            entry['products_bought'][product_name] = None
+            
+            # The daily trend keys on stripped values and, like
+            # _dated_revenues(), skips rows whose Date/CustomerID is not text
+            try:
+                date = get('Date', '').strip()
+                daily_customer = get('CustomerID', '').strip()
+            except AttributeError:
+                continue
+            yield date, daily_customer, revenue
+    
+    daily_data = _update_daily(defaultdict(_new_daily_entry), dated_revenues())
+    
+    # Step 2: Finish each result exactly as the individual functions do
+    daily_trend = _daily_trend(daily_data)
+    
+    return {
+        'total_revenue': total_revenue,
+        'region_sales': _rank_regions(region_data, total_revenue),
+        'top_products': _top_products(product_data, top_n),
+        'customer_stats': _rank_customers(customer_data),
+        'daily_trend': daily_trend,
+        'peak_day': find_peak_sales_day(transactions, daily_trend=daily_trend),
+        'low_products': _low_products(product_data, low_threshold),
+        'date_range': (first_date, last_date) if first_date else None
+    }
+
 """
 Generate comprehensive text report as per Task 4.1
 """
 
 from datetime import datetime
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+# Row templates for the report tables; each table is rendered with one
+# ''.join() over these instead of a separate f-string yield per row
+_REGION_ROW = "{region:<15}${total_sales:>18,.2f}{percentage:>14.2f}%{transaction_count:>14}\n"
+_PRODUCT_ROW = "{rank:<8}{product:<30}{quantity:<15}${revenue:,.2f}\n"
+_CUSTOMER_ROW = "{rank:<8}{customer_id:<20}${total_spent:>18,.2f}{purchase_count:>14}\n"
+_DAILY_ROW = "{date:<15}${revenue:>18,.2f}{transaction_count:>17}{unique_customers:>16}\n"
+
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          analytics=None):
     """
     Generates a comprehensive formatted text report
     
+    Pass analytics (the result of compute_all_analytics with its default
+    top_n/low_threshold) to reuse aggregates that were already computed;
+    otherwise they are computed here in a single pass
+    
     Report Must Include (in this order):
     
     1. HEADER
@@ -611,229 +798,223 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
        - List of products that couldn't be enriched
     """
     
-    from utils.data_processor import (
-        calculate_total_revenue,
-        region_wise_sales,
-        top_selling_products,
-        customer_analysis,
-        daily_sales_trend,
-        find_peak_sales_day,
-        low_performing_products
-    )
-    
     print(f"\n[Generating Comprehensive Report to {output_file}]")
     
-    report_lines = []
+    # Every section reads from one set of aggregates, computed in a single
+    # pass over transactions unless the caller already has them
+    if analytics is None:
+        analytics = compute_all_analytics(transactions)
     
+    # Write to file; the report only holds summaries (top-N tables and
+    # per-region/per-product lines), so join the sections into one string
+    # and write it in a single call.
+    # Building it first also leaves any previous report untouched if a
+    # section fails
+    try:
+        report = ''.join(_report_sections(transactions, enriched_transactions, analytics))
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"✓ Comprehensive report generated: {output_file}")
+        return True
+    except Exception as e:
+        print(f"✗ Error generating report: {e}", file=sys.stderr)
+        return False
+
+
+def _report_sections(transactions, enriched_transactions, analytics):
+    """
+    Yield the text of the sales report piece by piece
+    generate_sales_report() joins them and writes the result in one call
+    """
     # ========================================================================
     # 1. HEADER
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append(" "*20 + "SALES ANALYTICS REPORT\n")
-    report_lines.append("="*70 + "\n\n")
+    yield "="*70 + "\n"
+    yield " "*20 + "SALES ANALYTICS REPORT\n"
+    yield "="*70 + "\n\n"
     
     generation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    report_lines.append(f"Report Generated: {generation_time}\n")
-    report_lines.append(f"Total Records Processed: {len(transactions)}\n")
-    report_lines.append("\n")
+    yield f"Report Generated: {generation_time}\n"
+    yield f"Total Records Processed: {len(transactions)}\n"
+    yield "\n"
     
     # ========================================================================
     # 2. OVERALL SUMMARY
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("1. OVERALL SUMMARY\n")
-    report_lines.append("="*70 + "\n\n")
+    yield "="*70 + "\n"
+    yield "1. OVERALL SUMMARY\n"
+    yield "="*70 + "\n\n"
     
-    total_revenue = calculate_total_revenue(transactions)
+    region_sales = analytics['region_sales']
+    total_revenue = analytics['total_revenue']
     total_transactions = len(transactions)
     avg_order_value = total_revenue / total_transactions if total_transactions > 0 else 0
     
-    # Get date range
-    dates = [t.get('Date', '') for t in transactions if t.get('Date')]
-    date_range = f"{min(dates)} to {max(dates)}" if dates else "N/A"
+    # Date range over every dated row, tracked in the analytics pass
+    date_range = analytics['date_range']
+    date_range = f"{date_range[0]} to {date_range[1]}" if date_range else "N/A"
     
-    report_lines.append(f"Total Revenue: ${total_revenue:,.2f}\n")
-    report_lines.append(f"Total Transactions: {total_transactions:,}\n")
-    report_lines.append(f"Average Order Value: ${avg_order_value:,.2f}\n")
-    report_lines.append(f"Date Range: {date_range}\n")
-    report_lines.append("\n")
+    yield f"Total Revenue: ${total_revenue:,.2f}\n"
+    yield f"Total Transactions: {total_transactions:,}\n"
+    yield f"Average Order Value: ${avg_order_value:,.2f}\n"
+    yield f"Date Range: {date_range}\n"
+    yield "\n"
     
     # ========================================================================
     # 3. REGION-WISE PERFORMANCE
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("2. REGION-WISE PERFORMANCE\n")
-    report_lines.append("="*70 + "\n\n")
-    
-    region_sales = region_wise_sales(transactions)
+    yield "="*70 + "\n"
+    yield "2. REGION-WISE PERFORMANCE\n"
+    yield "="*70 + "\n\n"
     
-    report_lines.append(f"{'Region':<15}{'Sales Amount':<20}{'Percentage':<15}{'Trans Count':<15}\n")
-    report_lines.append("-"*70 + "\n")
+    yield f"{'Region':<15}{'Sales Amount':<20}{'Percentage':<15}{'Trans Count':<15}\n"
+    yield "-"*70 + "\n"
     
-    for region, stats in region_sales.items():
-        report_lines.append(
-            f"{region:<15}"
-            f"${stats['total_sales']:>18,.2f}"
-            f"{stats['percentage']:>14.2f}%"
-            f"{stats['transaction_count']:>14}\n"
-        )
+    yield ''.join(
+        _REGION_ROW.format(region=region, **stats)
+        for region, stats in region_sales.items()
+    )
     
-    report_lines.append("\n")
+    yield "\n"
     
     # ========================================================================
     # 4. TOP 5 PRODUCTS
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("3. TOP 5 PRODUCTS\n")
-    report_lines.append("="*70 + "\n\n")
+    yield "="*70 + "\n"
+    yield "3. TOP 5 PRODUCTS\n"
+    yield "="*70 + "\n\n"
     
-    top_products = top_selling_products(transactions, n=5)
+    top_products = analytics['top_products']
     
-    report_lines.append(f"{'Rank':<8}{'Product Name':<30}{'Qty Sold':<15}{'Revenue':<17}\n")
-    report_lines.append("-"*70 + "\n")
+    yield f"{'Rank':<8}{'Product Name':<30}{'Qty Sold':<15}{'Revenue':<17}\n"
+    yield "-"*70 + "\n"
     
-    for i, (product, quantity, revenue) in enumerate(top_products, 1):
-        report_lines.append(
-            f"{i:<8}"
-            f"{product[:28]:<30}"
-            f"{int(quantity):<15}"
-            f"${revenue:,.2f}\n"
-        )
+    yield ''.join(
+        _PRODUCT_ROW.format(rank=i, product=product[:28], quantity=int(quantity), revenue=revenue)
+        for i, (product, quantity, revenue) in enumerate(top_products, 1)
+    )
     
-    report_lines.append("\n")
+    yield "\n"
     
     # ========================================================================
     # 5. TOP 5 CUSTOMERS
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("4. TOP 5 CUSTOMERS\n")
-    report_lines.append("="*70 + "\n\n")
-    
-    customer_stats = customer_analysis(transactions)
-    top_5_customers = list(customer_stats.items())[:5]
-    
-    report_lines.append(f"{'Rank':<8}{'Customer ID':<20}{'Total Spent':<20}{'Order Count':<15}\n")
-    report_lines.append("-"*70 + "\n")
-    
-    for i, (customer_id, stats) in enumerate(top_5_customers, 1):
-        report_lines.append(
-            f"{i:<8}"
-            f"{customer_id:<20}"
-            f"${stats['total_spent']:>18,.2f}"
-            f"{stats['purchase_count']:>14}\n"
-        )
+    yield "="*70 + "\n"
+    yield "4. TOP 5 CUSTOMERS\n"
+    yield "="*70 + "\n\n"
+    
+    customer_stats = analytics['customer_stats']
+    # customer_stats is already sorted by total_spent; take the first five
+    # without materializing every customer into a list
+    top_5_customers = islice(customer_stats.items(), 5)
     
-    report_lines.append("\n")
+    yield f"{'Rank':<8}{'Customer ID':<20}{'Total Spent':<20}{'Order Count':<15}\n"
+    yield "-"*70 + "\n"
+    
+    yield ''.join(
+        _CUSTOMER_ROW.format(rank=i, customer_id=customer_id, **stats)
+        for i, (customer_id, stats) in enumerate(top_5_customers, 1)
+    )
+    
+    yield "\n"
     
     # ========================================================================
     # 6. DAILY SALES TREND
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("5. DAILY SALES TREND\n")
-    report_lines.append("="*70 + "\n\n")
-    
-    daily_trend = daily_sales_trend(transactions)
-    
-    report_lines.append(f"{'Date':<15}{'Revenue':<20}{'Transactions':<18}{'Unique Customers':<17}\n")
-    report_lines.append("-"*70 + "\n")
-    
-    # Show first 10 days
-    for i, (date, stats) in enumerate(daily_trend.items()):
-        if i < 10:
-            report_lines.append(
-                f"{date:<15}"
-                f"${stats['revenue']:>18,.2f}"
-                f"{stats['transaction_count']:>17}"
-                f"{stats['unique_customers']:>16}\n"
-            )
+    yield "="*70 + "\n"
+    yield "5. DAILY SALES TREND\n"
+    yield "="*70 + "\n\n"
+    
+    yield f"{'Date':<15}{'Revenue':<20}{'Transactions':<18}{'Unique Customers':<17}\n"
+    yield "-"*70 + "\n"
+    
+    # Show first 10 days (islice stops after ten instead of walking every day)
+    daily_trend = analytics['daily_trend']
+    yield ''.join(
+        _DAILY_ROW.format(date=date, **stats)
+        for date, stats in islice(daily_trend.items(), 10)
+    )
     
     if len(daily_trend) > 10:
-        report_lines.append(f"... ({len(daily_trend) - 10} more days)\n")
+        yield f"... ({len(daily_trend) - 10} more days)\n"
     
-    report_lines.append(f"\nTotal Days with Sales: {len(daily_trend)}\n")
-    report_lines.append("\n")
+    yield f"\nTotal Days with Sales: {len(daily_trend)}\n"
+    yield "\n"
     
     # ========================================================================
     # 7. PRODUCT PERFORMANCE ANALYSIS
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("6. PRODUCT PERFORMANCE ANALYSIS\n")
-    report_lines.append("="*70 + "\n\n")
+    yield "="*70 + "\n"
+    yield "6. PRODUCT PERFORMANCE ANALYSIS\n"
+    yield "="*70 + "\n\n"
     
     # Best selling day
-    peak_date, peak_revenue, peak_count = find_peak_sales_day(transactions)
-    report_lines.append(f"Best Selling Day: {peak_date}\n")
-    report_lines.append(f"  Revenue: ${peak_revenue:,.2f}\n")
-    report_lines.append(f"  Transactions: {peak_count}\n\n")
+    peak_date, peak_revenue, peak_count = analytics['peak_day']
+    yield f"Best Selling Day: {peak_date}\n"
+    yield f"  Revenue: ${peak_revenue:,.2f}\n"
+    yield f"  Transactions: {peak_count}\n\n"
     
     # Low performing products
-    low_products = low_performing_products(transactions, threshold=10)
+    low_products = analytics['low_products']
     if low_products:
-        report_lines.append("Low Performing Products (Quantity < 10):\n")
+        yield "Low Performing Products (Quantity < 10):\n"
         for product, quantity, revenue in low_products:
-            report_lines.append(f"  - {product}: {quantity} units, ${revenue:,.2f}\n")
+            yield f"  - {product}: {quantity} units, ${revenue:,.2f}\n"
     else:
-        report_lines.append("No low performing products found.\n")
+        yield "No low performing products found.\n"
     
-    report_lines.append("\n")
+    yield "\n"
     
     # Average transaction value per region
-    report_lines.append("Average Transaction Value by Region:\n")
+    yield "Average Transaction Value by Region:\n"
     for region, stats in region_sales.items():
         avg_value = stats['total_sales'] / stats['transaction_count'] if stats['transaction_count'] > 0 else 0
-        report_lines.append(f"  {region}: ${avg_value:,.2f}\n")
+        yield f"  {region}: ${avg_value:,.2f}\n"
     
-    report_lines.append("\n")
+    yield "\n"
     
     # ========================================================================
     # 8. API ENRICHMENT SUMMARY
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append("7. API ENRICHMENT SUMMARY\n")
-    report_lines.append("="*70 + "\n\n")
+    yield "="*70 + "\n"
+    yield "7. API ENRICHMENT SUMMARY\n"
+    yield "="*70 + "\n\n"
     
     if enriched_transactions:
         total_enriched = len(enriched_transactions)
-        matched = sum(1 for t in enriched_transactions if t.get('API_Match') == True)
+        
+        # One pass counts matches and collects unmatched products, keeping
+        # the first name seen for each ProductID (dicts preserve order)
+        matched = 0
+        unique_unmatched = {}
+        for t in enriched_transactions:
+            api_match = t.get('API_Match')
+            if api_match == True:
+                matched += 1
+            if not api_match:
+                unique_unmatched.setdefault(t.get('ProductID', 'Unknown'), t.get('ProductName', 'Unknown'))
+        
         success_rate = (matched / total_enriched * 100) if total_enriched > 0 else 0
         
-        report_lines.append(f"Total Records Enriched: {total_enriched}\n")
-        report_lines.append(f"Successfully Matched: {matched}\n")
-        report_lines.append(f"Success Rate: {success_rate:.2f}%\n\n")
+        yield f"Total Records Enriched: {total_enriched}\n"
+        yield f"Successfully Matched: {matched}\n"
+        yield f"Success Rate: {success_rate:.2f}%\n\n"
         
         # List products that couldn't be enriched
-        unmatched = [t for t in enriched_transactions if not t.get('API_Match')]
-        if unmatched:
-            report_lines.append("Products that couldn't be enriched:\n")
-            unique_unmatched = {}
-            for t in unmatched:
-                prod_id = t.get('ProductID', 'Unknown')
-                prod_name = t.get('ProductName', 'Unknown')
-                if prod_id not in unique_unmatched:
-                    unique_unmatched[prod_id] = prod_name
-            
+        if unique_unmatched:
+            yield "Products that couldn't be enriched:\n"
             for prod_id, prod_name in unique_unmatched.items():
-                report_lines.append(f"  - {prod_id}: {prod_name}\n")
+                yield f"  - {prod_id}: {prod_name}\n"
         else:
-            report_lines.append("All products were successfully enriched!\n")
+            yield "All products were successfully enriched!\n"
     else:
-        report_lines.append("No API enrichment data available.\n")
+        yield "No API enrichment data available.\n"
     
-    report_lines.append("\n")
+    yield "\n"
     
     # ========================================================================
     # FOOTER
     # ========================================================================
-    report_lines.append("="*70 + "\n")
-    report_lines.append(" "*25 + "END OF REPORT\n")
-    report_lines.append("="*70 + "\n")
-    
-    # Write to file
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.writelines(report_lines)
-        print(f"✓ Comprehensive report generated: {output_file}")
-        return True
-    except Exception as e:
-        print(f"✗ Error generating report: {e}")
-        return False
\ No newline at end of file
+    yield "="*70 + "\n"
+    yield " "*25 + "END OF REPORT\n"
+    yield "="*70 + "\n"
\ No newline at end of file
@@ -4,31 +4,54 @@ Handles file I/O, validation, and filtering operations
 """
 
 import codecs
+import io
+from collections import Counter
+
+# Encodings tried, in order, when a file is not valid UTF-8
+FALLBACK_ENCODINGS = ('latin-1', 'cp1252', 'iso-8859-1')
 
 def read_file(file_path):
     """
     Read pipe-delimited file with proper encoding handling
     Returns list of lines
     """
+    # Read the raw bytes once; encoding fallbacks decode from memory
+    # instead of re-reading the file from disk for every attempt
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    
     try:
         # Try UTF-8 first
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        lines = _decode_lines(data, 'utf-8')
         print(f"✓ File read successfully with UTF-8 encoding")
         return lines
     except UnicodeDecodeError:
         # Fallback to other encodings
-        encodings = ['latin-1', 'cp1252', 'iso-8859-1']
-        for encoding in encodings:
+        for encoding in FALLBACK_ENCODINGS:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    lines = f.readlines()
+                lines = _decode_lines(data, encoding)
                 print(f"✓ File read successfully with {encoding} encoding")
                 return lines
             except UnicodeDecodeError:
                 continue
         raise Exception("Unable to decode file with any known encoding")
 
+def _decode_lines(data, encoding):
+    """
+    Split in-memory file bytes into lines exactly as open(..., 'r') would
+    (same universal-newline handling as readlines())
+    """
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding).readlines()
+
+def iter_lines(file_path, encoding='utf-8'):
+    """
+    Yield lines from a pipe-delimited file one at a time
+    Unlike read_file(), only one buffered chunk is held in memory, so
+    callers can clean/aggregate files larger than RAM as they stream
+    """
+    with open(file_path, 'r', encoding=encoding) as f:
+        yield from f
+
 def write_file(file_path, lines):
     """
     Write cleaned data to file in UTF-8 encoding
@@ -41,7 +64,8 @@ def parse_line(line):
     """
     Parse pipe-delimited line into fields
     """
-    return [field.strip() for field in line.strip().split('|')]
+    # Stripping every field also trims the line ends
+    return list(map(str.strip, line.split('|')))
 
 def create_line(fields):
     """
@@ -49,11 +73,27 @@ def create_line(fields):
     """
     return '|'.join(fields) + '\n'
 
+def parse_number(value):
+    """
+    Parse a numeric field that may contain thousands separators
+    Raises ValueError (or TypeError) if the value is not numeric
+    """
+    if isinstance(value, str):
+        # Skip the replace() copy for the common case of no separators
+        return float(value.replace(',', '')) if ',' in value else float(value)
+    return float(str(value).replace(',', ''))
+
 
 # ============================================================================
 # TASK 11c: Data Validation and Filtering
 # ============================================================================
 
+# Expected first characters of TransactionID, ProductID and CustomerID
+_ID_PREFIXES = ('T', 'P', 'C')
+
+# Fields every transaction must carry with a non-empty value
+_REQUIRED_FIELDS = ('TransactionID', 'ProductID', 'CustomerID', 'Quantity', 'UnitPrice')
+
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
     """
     Validates transactions and applies optional filters
@@ -94,7 +134,6 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     """
     
     valid_transactions = []
-    invalid_count = 0
     
     # Initialize filter summary
     filter_summary = {
@@ -112,14 +151,27 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     
     validated_transactions = []
     
+    # Invalid rows are tallied per reason and reported once after the loop,
+    # rather than printing a line for every rejected transaction
+    invalid_reasons = Counter()
+    
+    # Bind hot-loop callables once instead of resolving them per row
+    validate = validate_transaction
+    keep = validated_transactions.append
+    
     for transaction in transactions:
-        is_valid, reason = validate_transaction(transaction)
+        is_valid, reason = validate(transaction)
         
         if is_valid:
-            validated_transactions.append(transaction)
+            keep(transaction)
         else:
-            invalid_count += 1
-            print(f"Invalid: {reason} - {transaction.get('TransactionID', 'Unknown')}")
+            invalid_reasons[reason] += 1
+    
+    invalid_count = sum(invalid_reasons.values())
+    if invalid_reasons:
+        print("Invalid transactions by reason:")
+        for reason, count in invalid_reasons.most_common():
+            print(f"  {reason}: {count}")
     
     filter_summary['invalid'] = invalid_count
     print(f"\n✓ Valid transactions after validation: {len(validated_transactions)}")
@@ -160,40 +212,47 @@ def validate_transaction(transaction):
     Validate a single transaction
     Returns (is_valid, reason)
     """
-    # Check required fields
-    required_fields = ['TransactionID', 'ProductID', 'CustomerID', 'Quantity', 'UnitPrice']
-    
-    for field in required_fields:
-        if field not in transaction or not transaction[field]:
+    # Check required fields (missing and empty values both fail)
+    get = transaction.get
+    for field in _REQUIRED_FIELDS:
+        if not get(field):
             return False, f"Missing required field: {field}"
     
-    # Validate Quantity > 0
-    try:
-        quantity = float(str(transaction['Quantity']).replace(',', ''))
-        if quantity <= 0:
-            return False, "Quantity must be > 0"
-    except (ValueError, TypeError):
-        return False, "Invalid Quantity format"
+    # Validate ID prefixes (T/P/C) first - the cheapest check - with a single
+    # tuple comparison of the first characters; only work out which one
+    # failed on the rare bad row
+    prefixes = (
+        str(transaction['TransactionID'])[:1],
+        str(transaction['ProductID'])[:1],
+        str(transaction['CustomerID'])[:1]
+    )
+    if prefixes != _ID_PREFIXES:
+        if prefixes[0] != 'T':
+            return False, "TransactionID must start with 'T'"
+        if prefixes[1] != 'P':
+            return False, "ProductID must start with 'P'"
+        return False, "CustomerID must start with 'C'"
     
-    # Validate UnitPrice > 0
+    # Parse Quantity and UnitPrice in one try block
+    quantity_value = transaction['Quantity']
     try:
-        unit_price = float(str(transaction['UnitPrice']).replace(',', ''))
-        if unit_price <= 0:
-            return False, "UnitPrice must be > 0"
+        quantity = parse_number(quantity_value)
+        unit_price = parse_number(transaction['UnitPrice'])
     except (ValueError, TypeError):
+        # Malformed number: re-check Quantity alone to report the same
+        # reason the field-by-field checks would
+        try:
+            if parse_number(quantity_value) <= 0:
+                return False, "Quantity must be > 0"
+        except (ValueError, TypeError):
+            return False, "Invalid Quantity format"
         return False, "Invalid UnitPrice format"
     
-    # Validate TransactionID starts with 'T'
-    if not str(transaction['TransactionID']).startswith('T'):
-        return False, "TransactionID must start with 'T'"
-    
-    # Validate ProductID starts with 'P'
-    if not str(transaction['ProductID']).startswith('P'):
-        return False, "ProductID must start with 'P'"
-    
-    # Validate CustomerID starts with 'C'
-    if not str(transaction['CustomerID']).startswith('C'):
-        return False, "CustomerID must start with 'C'"
+    # Validate Quantity > 0 and UnitPrice > 0
+    if quantity <= 0:
+        return False, "Quantity must be > 0"
+    if unit_price <= 0:
+        return False, "UnitPrice must be > 0"
     
     return True, "Valid"
 
@@ -202,7 +261,9 @@ def filter_by_region(transactions, region):
     """
     Filter transactions by specific region
     """
-    return [t for t in transactions if t.get('Region', '').lower() == region.lower()]
+    # Lower-case the target once rather than once per row
+    target = region.lower()
+    return [t for t in transactions if t.get('Region', '').lower() == target]
 
 
 def filter_by_amount(transactions, min_amount=None, max_amount=None):
@@ -213,8 +274,8 @@ def filter_by_amount(transactions, min_amount=None, max_amount=None):
     
     for transaction in transactions:
         try:
-            quantity = float(str(transaction['Quantity']).replace(',', ''))
-            unit_price = float(str(transaction['UnitPrice']).replace(',', ''))
+            quantity = parse_number(transaction['Quantity'])
+            unit_price = parse_number(transaction['UnitPrice'])
             amount = quantity * unit_price
             
             # Check min_amount
@@ -236,12 +297,9 @@ def get_available_regions(transactions):
     """
     Get list of unique regions from transactions
     """
-    regions = set()
-    for transaction in transactions:
-        region = transaction.get('Region', '')
-        if region:
-            regions.add(region)
-    return sorted(list(regions))
+    # Build the set in one comprehension; filter(None, ...) drops empty regions
+    regions = {transaction.get('Region', '') for transaction in transactions}
+    return sorted(filter(None, regions))
 
 
 def get_transaction_amount_range(transactions):
@@ -253,8 +311,8 @@ def get_transaction_amount_range(transactions):
     
     for transaction in transactions:
         try:
-            quantity = float(str(transaction['Quantity']).replace(',', ''))
-            unit_price = float(str(transaction['UnitPrice']).replace(',', ''))
+            quantity = parse_number(transaction['Quantity'])
+            unit_price = parse_number(transaction['UnitPrice'])
             amount = quantity * unit_price
             amounts.append(amount)
         except (ValueError, TypeError, KeyError):
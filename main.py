@@ -3,17 +3,17 @@ Sales Analytics System - Complete Integrated Main Script
 Includes: Data Cleaning, Data Processing, API Integration, and Comprehensive Reporting
 """
 
+import argparse
+import contextlib
 import os
-from utils.file_handler import read_file, write_file, parse_line
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from utils.file_handler import FALLBACK_ENCODINGS, iter_lines, parse_line
 from utils.data_processor import (
     DataCleaner,
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products,
+    compute_all_analytics,
     generate_sales_report
 )
 from utils.api_handler import (
@@ -25,9 +25,25 @@ from utils.api_handler import (
 )
 
 
+# Number of input lines cleaned and written per batch in Part 1
+CLEAN_BATCH_SIZE = 8192
+
+# Column order of the pipe-delimited sales file
+TRANSACTION_FIELDS = (
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region'
+)
+
+# Positions of the low-cardinality columns (Date, ProductID, ProductName,
+# CustomerID, Region) whose values repeat across many rows
+INTERNED_FIELD_INDEXES = (1, 2, 3, 6, 7)
+
+
 def convert_to_transactions(lines):
     """Convert pipe-delimited lines to transaction dictionaries"""
     transactions = []
+    add = transactions.append
+    intern = sys.intern
     
     for line in lines:
         if not line.strip():
@@ -36,23 +52,109 @@ def convert_to_transactions(lines):
         fields = parse_line(line)
         
         if len(fields) >= 8:
-            transaction = {
-                'TransactionID': fields[0],
-                'Date': fields[1],
-                'ProductID': fields[2],
-                'ProductName': fields[3],
-                'Quantity': fields[4],
-                'UnitPrice': fields[5],
-                'CustomerID': fields[6],
-                'Region': fields[7]
-            }
-            transactions.append(transaction)
+            # Interning makes every row share one string object per distinct
+            # value, and later dict lookups on them hit the identity fast path
+            for i in INTERNED_FIELD_INDEXES:
+                fields[i] = intern(fields[i])
+            
+            # zip stops after the eight named columns, ignoring extra fields
+            add(dict(zip(TRANSACTION_FIELDS, fields)))
     
     return transactions
 
 
+def clean_in_batches(cleaner, input_file, encoding, output_file, invalid_file,
+                     batch_size=CLEAN_BATCH_SIZE):
+    """
+    Stream input_file through the cleaner batch_size lines at a time
+    Cleaned and invalid lines are written as each batch is processed and
+    transactions are built incrementally, so the raw file is never held
+    in memory; the invalid file is only created if there are invalid lines
+    Raises UnicodeDecodeError if input_file is not valid in encoding (a
+    partially written invalid file is removed first)
+    Returns (line_count, transactions, invalid_written)
+    """
+    line_count = 0
+    transactions = []
+    invalid_out = None
+    lines = iter_lines(input_file, encoding)
+    
+    try:
+        # Read the first batch before creating any output, so a missing or
+        # undecodable input leaves the previous outputs untouched
+        batch = list(islice(lines, batch_size))
+        with open(output_file, 'w', encoding='utf-8') as cleaned_out:
+            while batch:
+                is_first = line_count == 0
+                line_count += len(batch)
+                valid_lines, invalid_lines = cleaner.process_records(batch, has_header=is_first)
+                
+                cleaned_out.writelines(valid_lines)
+                if invalid_lines:
+                    if invalid_out is None:
+                        invalid_out = open(invalid_file, 'w', encoding='utf-8')
+                    invalid_out.writelines(invalid_lines)
+                
+                # The first batch starts with the header line
+                transactions.extend(convert_to_transactions(valid_lines[1:] if is_first else valid_lines))
+                
+                batch = list(islice(lines, batch_size))
+    except UnicodeDecodeError:
+        if invalid_out is not None:
+            invalid_out.close()
+            os.remove(invalid_file)
+            invalid_out = None
+        raise
+    finally:
+        lines.close()
+        if invalid_out is not None:
+            invalid_out.close()
+    
+    return line_count, transactions, invalid_out is not None
+
+
+def clean_input_file(input_file, output_file, invalid_file):
+    """
+    Clean input_file with clean_in_batches(), streaming it as UTF-8 and
+    restarting with each fallback encoding only if decoding fails, so a
+    UTF-8 file is read exactly once
+    Returns (encoding, cleaner, line_count, transactions, invalid_written)
+    """
+    for encoding in ('utf-8',) + FALLBACK_ENCODINGS:
+        cleaner = DataCleaner()
+        try:
+            result = clean_in_batches(cleaner, input_file, encoding, output_file, invalid_file)
+        except UnicodeDecodeError:
+            continue
+        return (encoding, cleaner) + result
+    raise Exception("Unable to decode file with any known encoding")
+
+
+def link_or_copy(source, destination):
+    """
+    Make destination a hard link to source, falling back to a file copy
+    (e.g. across filesystems or where links are unsupported)
+    Returns True on success, False (after reporting the error) otherwise
+    """
+    try:
+        if os.path.lexists(destination):
+            os.remove(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+    except OSError as e:
+        print(f"✗ Error saving enriched data to {destination}: {e}", file=sys.stderr)
+        return False
+    return True
+
+
 def main():
-    """Main execution function - runs all tasks"""
+    """
+    Main execution function - runs all tasks
+    Returns the process exit status: 0 on success, 1 if reading the input
+    or generating the report failed
+    """
     
     print("\n" + "="*70)
     print(" "*15 + "SALES ANALYTICS SYSTEM")
@@ -71,33 +173,43 @@ def main():
     output_file = 'output/sales_data_cleaned.txt'
     invalid_file = 'output/invalid_records.txt'
     
-    # Step 1: Read the file
+    # Steps 1-3: Stream the file through the cleaner batch by batch, writing
+    # cleaned/invalid lines and converting to transactions as it goes
     print("[Step 1] Reading input file...")
     try:
-        lines = read_file(input_file)
-        print(f"✓ Read {len(lines)} lines from {input_file}")
+        encoding, cleaner, line_count, transactions, invalid_written = clean_input_file(
+            input_file, output_file, invalid_file
+        )
+        print(f"✓ File read successfully with {encoding} encoding")
+        print(f"✓ Read {line_count} lines from {input_file}")
     except Exception as e:
-        print(f"✗ Error reading file: {e}")
-        return
+        print(f"✗ Error reading file: {e}", file=sys.stderr)
+        return 1
+    
+    # Start the product fetch only once the input has been read, so a failed
+    # run neither waits on the network nor rewrites the cache; it still
+    # overlaps with the rest of Part 1 and Part 2. Its messages are buffered
+    # as (message, is_error) and printed in Part 3
+    api_messages = []
+    api_executor = ThreadPoolExecutor(max_workers=1)
+    api_future = api_executor.submit(
+        fetch_all_products,
+        log=lambda message: api_messages.append((message, False)),
+        error=lambda message: api_messages.append((message, True))
+    )
+    api_executor.shutdown(wait=False)
     
-    # Step 2: Process and clean data
     print("\n[Step 2] Processing and cleaning data...")
-    cleaner = DataCleaner()
-    valid_lines, invalid_lines = cleaner.process_records(lines)
+    print(f"✓ Cleaned {line_count} lines in batches of {CLEAN_BATCH_SIZE}")
     
-    # Step 3: Write cleaned data
     print("\n[Step 3] Writing cleaned data...")
-    write_file(output_file, valid_lines)
-    
-    if invalid_lines:
-        write_file(invalid_file, invalid_lines)
+    print(f"✓ File written successfully to {output_file}")
+    if invalid_written:
+        print(f"✓ File written successfully to {invalid_file}")
     
     # Step 4: Print summary
     cleaner.print_summary()
     
-    # Convert to transactions for further processing
-    transactions = convert_to_transactions(valid_lines[1:])  # Skip header
-    
     print("\n✓ Part 1: Data Cleaning Completed!")
     
     # ========================================================================
@@ -109,14 +221,15 @@ def main():
     
     print("[Running Analytics Functions...]")
     
-    # Run all analytics (silently for now, will be in report)
-    total_revenue = calculate_total_revenue(transactions)
-    region_sales = region_wise_sales(transactions)
-    top_products = top_selling_products(transactions, n=5)
-    customer_stats = customer_analysis(transactions)
-    daily_trend = daily_sales_trend(transactions)
-    peak_date, peak_revenue, peak_count = find_peak_sales_day(transactions)
-    low_products = low_performing_products(transactions, threshold=10)
+    # Run all analytics in one pass (silently for now, will be in report)
+    analytics = compute_all_analytics(transactions, top_n=5, low_threshold=10)
+    total_revenue = analytics['total_revenue']
+    region_sales = analytics['region_sales']
+    top_products = analytics['top_products']
+    customer_stats = analytics['customer_stats']
+    daily_trend = analytics['daily_trend']
+    peak_date, peak_revenue, peak_count = analytics['peak_day']
+    low_products = analytics['low_products']
     
     print(f"✓ Total Revenue: ${total_revenue:,.2f}")
     print(f"✓ Analyzed {len(region_sales)} regions")
@@ -136,7 +249,9 @@ def main():
     
     # Task 3.1: Fetch products from API
     print("[Task 3.1] Fetching products from API...")
-    api_products = fetch_all_products()
+    api_products = api_future.result()
+    for message, is_error in api_messages:
+        print(message, file=sys.stderr if is_error else sys.stdout)
     
     enriched_transactions = None
     
@@ -148,19 +263,22 @@ def main():
         
         # Task 3.2: Enrich sales data
         print("\n[Task 3.2] Enriching sales data with API information...")
-        enriched_transactions = enrich_sales_data(transactions, product_mapping)
+        # main owns the transactions, so enrich them without per-row copies
+        enriched_transactions = enrich_sales_data(transactions, product_mapping, in_place=True)
         
-        # Save enriched data
-        save_enriched_data(enriched_transactions, 'data/enriched_sales_data.txt')
-        save_enriched_data(enriched_transactions, 'output/enriched_sales_data.txt')
+        # Save enriched data once; the output/ copy is linked to it instead
+        # of formatting and writing every row a second time
+        if save_enriched_data(enriched_transactions, 'data/enriched_sales_data.txt'):
+            if link_or_copy('data/enriched_sales_data.txt', 'output/enriched_sales_data.txt'):
+                print("✓ Enriched data saved to output/enriched_sales_data.txt")
         
         # Print enrichment summary
         print_enrichment_summary(enriched_transactions)
         
         print("\n✓ Part 3: API Integration Completed!")
     else:
-        print("\n⚠ Part 3: API Integration Skipped (API not available)")
-        print("  Continuing with non-enriched data...")
+        print("\n⚠ Part 3: API Integration Skipped (API not available)", file=sys.stderr)
+        print("  Continuing with non-enriched data...", file=sys.stderr)
     
     # ========================================================================
     # PART 4: COMPREHENSIVE REPORT GENERATION
@@ -175,13 +293,14 @@ def main():
     success = generate_sales_report(
         transactions, 
         enriched_transactions,
-        output_file='output/sales_report.txt'
+        output_file='output/sales_report.txt',
+        analytics=analytics
     )
     
     if success:
         print("\n✓ Part 4: Report Generation Completed!")
     else:
-        print("\n✗ Part 4: Report Generation Failed!")
+        print("\n✗ Part 4: Report Generation Failed!", file=sys.stderr)
     
     # ========================================================================
     # SUMMARY
@@ -212,7 +331,29 @@ def main():
     print("  2. Check enriched data: output/enriched_sales_data.txt")
     print("  3. Analyze cleaned data: output/sales_data_cleaned.txt")
     print("\nThank you for using Sales Analytics System!\n")
+    
+    # Non-zero exit status lets batch runs detect a failed report
+    return 0 if success else 1
+
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help="suppress progress output (all files are still generated)"
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.quiet:
+        # Send every progress print (including the helpers') to devnull;
+        # error messages go to stderr and stay visible
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            exit_code = main()
+    else:
+        exit_code = main()
+    sys.exit(exit_code)
\ No newline at end of file